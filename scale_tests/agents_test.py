@@ -16,9 +16,15 @@
 from time import time
 
 from .framework.constants import BLUEPRINT_TYPES
+from .framework.sharding import datadog_hostname
+from .framework.manager_load import (ManagerLoadSampler,
+                                     save_soak_report,
+                                     log_soak_comparison)
 
+DATADOG_HOST_MAP_URL = 'https://app.datadoghq.com/infrastructure/map?filter=host:{}'
 
-def test_agents(resource_creator, deployments_count, request, logger):
+
+def test_agents(resource_creator, deployments_count, results_dir, request, logger):
     """
     Test how agents affect the manager
     """
@@ -37,10 +43,16 @@ def test_agents(resource_creator, deployments_count, request, logger):
     logger.info('{0} with {1} blueprint took {2:.2f} seconds'.format(
         'test_agents', blueprint_type, (end_time - start_time)))
     logger.info("For checking the manager's metrics in Datadog go to {}"
-                .format('https://app.datadoghq.com/dash/host/328651819'))
+                .format(DATADOG_HOST_MAP_URL.format(datadog_hostname(resource_creator.manager))))
 
-    # Enable the user to check the manager's metrics in Datadog
-    raw_input('Enter any key to end the test and destroy the manager : ')
+    # Soak the manager with the installed agents while sampling its load
+    soak_duration = int(request.config.getoption('--soak-duration'))
+    soak_interval = int(request.config.getoption('--soak-interval'))
+    sampler = ManagerLoadSampler(resource_creator.manager, logger)
+    samples = sampler.soak(soak_duration, soak_interval)
+    report_path = save_soak_report(results_dir, blueprint_type, deployments_count, samples)
+    logger.info('The soak report was saved to {}'.format(report_path))
+    log_soak_comparison(results_dir, logger)
     resource_creator.uninstall_all_deployments(threads_count)
     resource_creator.delete_all_deployments(threads_count)
 
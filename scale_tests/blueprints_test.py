@@ -16,17 +16,20 @@
 from time import time
 
 from .framework import util
+from .framework.storage_report import StorageAccounting
 
 
-def test_many_blueprints_uploads(manager, resource_creator, request, logger):
+def test_many_blueprints_uploads(manager, resource_creator, results_dir, request, logger):
     """
     Test many blueprints uploads
     """
     start_time = time()
     threads_count = 20
     blueprints_count = int(request.config.getoption('--blueprints-count'))
-    util.check_disk_space(manager, logger)
+    storage = StorageAccounting(manager, results_dir, logger)
+    storage_before = storage.snapshot()
     resource_creator.upload_blueprints(blueprints_count, threads_count)
+    storage.report('blueprints_uploads', storage_before, storage.snapshot())
 
     # Creating one deployment to see how much time it takes
     blueprint_id = resource_creator.upload_blueprint()
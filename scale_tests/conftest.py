@@ -1,15 +1,62 @@
 import os
+import logging
+
 import pytest
 
 from cosmo_tester.framework import util
 from cosmo_tester.framework.test_hosts import TestHosts
 
+from .framework.tracing import tracer
+from .framework.profiling import profiler
+from .framework.sharding import record_manager, datadog_hostname
+from .framework.manager_session import ManagerSession
 from .framework.constants import BLUEPRINT_TYPES
 from .framework.blueprint_example import BlueprintExample
 from .framework.concurrent_resource_creator import ConcurrentResourceCreator
 
 pytest_plugins = "cosmo_tester.conftest"
 DATADOG_INSTALL_SCRIPT = 'https://raw.githubusercontent.com/DataDog/dd-agent/master/packaging/datadog-agent/source/install_agent.sh'  # NOQA
+session_logger = logging.getLogger('scale_tests')
+
+
+@pytest.fixture(scope='session')
+def results_dir(request):
+    """The directory the tests' results (traces, reports...) are saved in"""
+    path = os.path.abspath(request.config.getoption('--results-dir'))
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return path
+
+
+@pytest.fixture(scope='session', autouse=True)
+def operations_trace(request, results_dir):
+    """Records the operations' spans and exports them when --trace is set"""
+    if not request.config.getoption('--trace'):
+        yield None
+        return
+
+    tracer.enable()
+    try:
+        yield tracer
+    finally:
+        trace_path = tracer.export(os.path.join(results_dir, 'trace.json'))
+        session_logger.info('Operations trace was saved to {}'.format(trace_path))
+
+
+@pytest.fixture(scope='session', autouse=True)
+def harness_profile(request, results_dir):
+    """Profiles the harness during each phase when --profile-harness is set"""
+    if not request.config.getoption('--profile-harness'):
+        yield None
+        return
+
+    profiler.enable(os.path.join(results_dir, 'profiles'), session_logger)
+    try:
+        yield profiler
+    finally:
+        summary_path = profiler.save_summary()
+        session_logger.info('Harness profiles were saved to {}'.format(
+            os.path.dirname(summary_path)))
 
 
 @pytest.fixture(scope='module')
@@ -22,16 +69,19 @@ def scale_attributes(attributes, logger):
 
 
 @pytest.fixture(scope='module')
-def manager(cfy, ssh_key, module_tmpdir, scale_attributes, logger):
+def manager(cfy, ssh_key, module_tmpdir, scale_attributes, results_dir, request, logger):
     """Creates a cloudify manager from an image in rackspace OpenStack."""
     cluster = TestHosts(cfy, ssh_key, module_tmpdir, scale_attributes, logger)
     cluster.create()
     current_manager = cluster.instances[0]
+    record_manager(results_dir, request.module.__name__.split('.')[-1],
+                   current_manager, scale_attributes)
     _install_datadog_agent(current_manager, logger)
     current_manager.use()
     try:
         yield current_manager
     finally:
+        ManagerSession.close_for(current_manager)
         cluster.destroy()
 
 
@@ -64,6 +114,23 @@ def pytest_addoption(parser):
                           .format(', '.join(BLUEPRINT_TYPES)))
     parser.addoption('--blueprints-count', action='store', default=10,
                      help='how many blueprints to upload')
+    parser.addoption('--dispatch-rates', action='store', default='1,5,10',
+                     help='comma separated executions submission rates (per second) '
+                          'for executions_test')
+    parser.addoption('--scale-deltas', action='store', default='1,2,4',
+                     help='comma separated growing deltas of the scale workflows '
+                          'for workflows_test')
+    parser.addoption('--soak-duration', action='store', default=600,
+                     help='for how many seconds to sample the manager load in agents_test')
+    parser.addoption('--soak-interval', action='store', default=10,
+                     help='how many seconds between samples of the manager load')
+    parser.addoption('--results-dir', action='store', default='scale-results',
+                     help='the directory the results are saved in')
+    parser.addoption('--trace', action='store_true', default=False,
+                     help='export a trace of the operations to the results directory')
+    parser.addoption('--profile-harness', action='store_true', default=False,
+                     help="profile the harness' phases and save the profiles to the "
+                          "results directory")
 
 
 def _install_datadog_agent(manager, logger):
@@ -74,6 +141,6 @@ def _install_datadog_agent(manager, logger):
         raise Exception('DD_API_KEY environment variable is not set')
 
     install_cmd = ('DD_HOSTNAME={0} DD_API_KEY={1} bash -c "$(curl -L {2})"'
-                   .format('scale-tests', dd_api_key, DATADOG_INSTALL_SCRIPT))
-    with manager.ssh() as fabric_ssh:
-        fabric_ssh.sudo(install_cmd)
+                   .format(datadog_hostname(manager), dd_api_key, DATADOG_INSTALL_SCRIPT))
+    ManagerSession.for_manager(manager).run(install_cmd, sudo=True,
+                                            label='Datadog agent installation')
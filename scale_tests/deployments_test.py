@@ -16,9 +16,11 @@
 from time import time
 
 from .framework import util
+from .framework.storage_report import StorageAccounting
 
 
-def test_many_deployments_creation(manager, resource_creator, deployments_count, logger):
+def test_many_deployments_creation(manager, resource_creator, deployments_count, results_dir,
+                                   logger):
     """
     Test many deployments creation
     """
@@ -26,7 +28,8 @@ def test_many_deployments_creation(manager, resource_creator, deployments_count,
     threads_count = 100
     deployments_count -= 1
     blueprint_id = resource_creator.upload_blueprint()
-    util.check_disk_space(manager, logger)
+    storage = StorageAccounting(manager, results_dir, logger)
+    storage_before = storage.snapshot()
     resource_creator.create_deployments(deployments_count,
                                         threads_count,
                                         blueprint_id,
@@ -36,7 +39,7 @@ def test_many_deployments_creation(manager, resource_creator, deployments_count,
     util.create_one_deployment(resource_creator, blueprint_id, logger)
     _nodes_list(manager.client, logger)
     _node_instances_list(manager.client, logger)
-    util.check_disk_space(manager, logger)
+    storage.report('deployments_creation', storage_before, storage.snapshot())
     resource_creator.delete_all_deployments(threads_count)
     end_time = time()
     logger.info('{0} took {1:.2f} seconds'.format(
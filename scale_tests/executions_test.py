@@ -0,0 +1,68 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from time import time
+
+from .framework.constants import NOOP_OPERATION
+from .framework.dispatch_benchmark import (WorkflowDispatchBenchmark,
+                                           assert_executions_succeeded,
+                                           save_dispatch_report)
+
+
+def test_workflow_dispatch_throughput(resource_creator, deployments_count, results_dir,
+                                      request, logger):
+    """
+    Test how fast the manager dispatches executions submitted at increasing rates
+    """
+    start_time = time()
+    threads_count = deployments_count
+    rates = [float(rate) for rate in
+             request.config.getoption('--dispatch-rates').split(',')]
+    _change_blueprint_to_noop(resource_creator)
+    blueprint_id = resource_creator.upload_blueprint()
+    resource_creator.create_deployments(deployments_count,
+                                        threads_count,
+                                        blueprint_id)
+    deployment_ids = resource_creator.deployments.ids()
+    benchmark = WorkflowDispatchBenchmark(resource_creator.client, logger, threads_count)
+
+    results = []
+    for rate in sorted(rates):
+        results.append(benchmark.run('install', deployment_ids, rate))
+        results.append(benchmark.run('execute_operation',
+                                     deployment_ids,
+                                     rate,
+                                     parameters={'operation': NOOP_OPERATION}))
+        results.append(benchmark.run('uninstall',
+                                     deployment_ids,
+                                     rate,
+                                     parameters={'ignore_failure': True},
+                                     allow_custom_parameters=True,
+                                     force=True))
+        for result in results[-3:]:
+            assert_executions_succeeded(result)
+    report_path = save_dispatch_report(results_dir, results)
+    logger.info('The workflow dispatch report was saved to {}'.format(report_path))
+
+    resource_creator.delete_all_deployments(threads_count)
+    end_time = time()
+    logger.info('{0} took {1:.2f} seconds'.format(
+        'test_workflow_dispatch_throughput', end_time - start_time))
+
+
+def _change_blueprint_to_noop(resource_creator):
+    resource_creator.blueprint_example.blueprint_path = \
+        'blueprint-examples/noop-blueprint.yaml'
+    resource_creator.blueprint_example.inputs = {}
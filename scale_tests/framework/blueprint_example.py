@@ -46,7 +46,7 @@ class BlueprintExample(object):
     @property
     def inputs(self):
         # Adding necessary inputs for openstack's blueprint
-        if not self._inputs and os.path.isfile(self.inputs_path):
+        if self._inputs is None and os.path.isfile(self.inputs_path):
             with open(self.inputs_path) as inputs_file:
                 self._inputs = yaml.load(inputs_file.read())
                 self._inputs.update({
@@ -62,6 +62,10 @@ class BlueprintExample(object):
     def inputs(self, blueprint_inputs):
         self._inputs = blueprint_inputs
 
+    def resource_path(self, path):
+        """The absolute path of a file, relative to the resources directory"""
+        return self._get_path(path)
+
     def _get_path(self, path):
         # Going up the directories to scale_tests because the path is relative
         # to resources directory
@@ -22,8 +22,11 @@ from retrying import retry
 
 from cloudify_rest_client import CloudifyClient
 
-from .util import get_resource_list
-from .constants import TERMINATED_STATE, PAGINATION_PARAMS
+from .tracing import tracer
+from .profiling import profiler
+from .util import get_resource_list, list_all_resources
+from .deployment_index import DeploymentIndex, INSTALLED, UNINSTALLED
+from .constants import TERMINATED_STATE, PAGINATION_PARAMS, DEFAULT_TENANT
 
 
 class ConcurrentResourceCreator(object):
@@ -35,18 +38,7 @@ class ConcurrentResourceCreator(object):
         self.client = manager.client
         self.blueprint_example = blueprint_example
         self.wait_after_action = 0
-        self._deployments = None
-
-    @property
-    def deployments(self):
-        if not self._deployments:
-            self._deployments = get_resource_list(
-                self.client.deployments, 'Deployments', self.logger, all_tenants=True)
-        return self._deployments
-
-    @deployments.setter
-    def deployments(self, deployments):
-        self._deployments = deployments
+        self.deployments = DeploymentIndex()
 
     def upload_blueprint(self, _=None, client=None):
         """
@@ -67,13 +59,17 @@ class ConcurrentResourceCreator(object):
             blueprints_count, elapsed_time))
         self._assert_blueprints_count(blueprints_count)
 
-    def create_deployment(self, blueprint_id, client=None):
+    def create_deployment(self, blueprint_id, client=None, tenant_name=DEFAULT_TENANT):
         client = client or self.client
-        deployment = client.deployments.create(blueprint_id,
-                                               deployment_id=uuid.uuid4().hex,
-                                               inputs=self.blueprint_example.inputs)
-
-        sleep(self.wait_after_action)
+        deployment_id = uuid.uuid4().hex
+        with tracer.span('deployments.create', category='http', resource_id=deployment_id):
+            deployment = client.deployments.create(blueprint_id,
+                                                   deployment_id=deployment_id,
+                                                   inputs=self.blueprint_example.inputs)
+        self.deployments.add(deployment.id, blueprint_id, tenant_name)
+
+        with tracer.span('wait_after_action', category='sleep', resource_id=deployment_id):
+            sleep(self.wait_after_action)
         return deployment.id
 
     def create_deployments(self, deployments_count, threads_count, blueprint_id,
@@ -87,7 +83,6 @@ class ConcurrentResourceCreator(object):
         self.logger.info('Created {0} deployments in {1:.2f} seconds'.format(
             deployments_count, elapsed_time))
         self.wait_after_action = 0
-        self._deployments = None
         self._wait_for_active_executions()
         self._assert_deployments_count(deployments_count + existing_deployments_count)
 
@@ -110,32 +105,32 @@ class ConcurrentResourceCreator(object):
             return
 
         self.logger.info('Installing {0} deployments...'.format(deployments_count))
-        deployment_ids = [deployment.id for deployment in
-                          self.deployments[:deployments_count]]
+        deployment_ids = self.deployments.ids()[:deployments_count]
         elapsed_time = self._run_action_concurrently(threads_count,
                                                      self._install_deployment,
                                                      deployment_ids)
         self.logger.info('Installed {0} deployments in {1:.2f} seconds'.format(
             deployments_count, elapsed_time))
         self._wait_for_active_executions()
+        self.deployments.set_status(deployment_ids, INSTALLED)
 
     def uninstall_all_deployments(self, threads_count):
         self.logger.info('Uninstalling {0} deployments...'.format(len(self.deployments)))
-        deployment_ids = [deployment.id for deployment in self.deployments]
+        deployment_ids = self.deployments.ids()
         elapsed_time = self._run_action_concurrently(
             threads_count, self._uninstall_deployment, deployment_ids)
         self.logger.info('Uninstalled {0} deployments in {1:.2f} seconds'
                          .format(len(deployment_ids), elapsed_time))
         self._wait_for_active_executions()
+        self.deployments.set_status(deployment_ids, UNINSTALLED)
 
     def delete_all_deployments(self, threads_count):
         self.logger.info('Deleting {0} deployments...'.format(len(self.deployments)))
-        deployment_ids = [deployment.id for deployment in self.deployments]
+        deployment_ids = self.deployments.ids()
         elapsed_time = self._run_action_concurrently(
             threads_count, self._delete_deployment, deployment_ids)
         self.logger.info('Deleted {0} deployments in {1:.2f} seconds'.format(
             len(deployment_ids), elapsed_time))
-        self._deployments = None
         self._assert_deployments_count(0)
 
     def upload_plugins(self, tenants, threads_count):
@@ -169,13 +164,16 @@ class ConcurrentResourceCreator(object):
     def _run_action_concurrently(self, threads_count, function, iterable):
         pool = Pool(processes=threads_count)
         start_time = time()
-        pool.map(function, iterable)
-        pool.close()
-        pool.join()
+        with tracer.span(function.__name__, category='phase'), \
+                profiler.phase(function.__name__):
+            pool.map(tracer.queued(profiler.profiled(function)), tracer.enqueue(iterable))
+            pool.close()
+            pool.join()
         end_time = time()
         return end_time - start_time
 
     @retry(stop_max_attempt_number=10, wait_fixed=60*1000)
+    @tracer.traced(category='polling')
     def _wait_for_active_executions(self):
         self.logger.info('Waiting for active executions')
         executions = self.client.executions.list(include_system_workflows=True,
@@ -191,7 +189,7 @@ class ConcurrentResourceCreator(object):
                                 password='admin',
                                 tenant=tenant_name)
         blueprint_id = self.upload_blueprint(client=client)
-        self.create_deployment(blueprint_id, client)
+        return self.create_deployment(blueprint_id, client, tenant_name)
 
     def _install_deployment(self, deployment_id):
         self.client.executions.start(deployment_id, 'install')
@@ -205,6 +203,7 @@ class ConcurrentResourceCreator(object):
 
     def _delete_deployment(self, deployment_id):
         self.client.deployments.delete(deployment_id)
+        self.deployments.remove(deployment_id)
 
     def _upload_plugin(self, tenant_name):
         # A small plugin for testing
@@ -222,17 +221,30 @@ class ConcurrentResourceCreator(object):
         self.client.tenants.delete(tenant_name)
 
     def _delete_tenant_resources(self, client):
-        deployments = client.deployments.list()
+        # Listing from the manager, as the index may miss some of the tenant's
+        # deployments. Listed before deleting, as deleting shifts the pages
+        deployments = list(list_all_resources(client.deployments,
+                                              _include=['id', 'blueprint_id']))
         for deployment in deployments:
             client.deployments.delete(deployment.id)
             client.blueprints.delete(deployment.blueprint_id)
+            self.deployments.remove(deployment.id)
 
         plugins = client.plugins.list()
         for plugin in plugins:
             client.plugins.delete(plugin.id)
 
+    def reconcile_deployments(self):
+        self.deployments.reconcile(self.client, self.logger)
+
     def _assert_deployments_count(self, expected_count):
-        assert self.deployments.metadata.pagination.total == expected_count
+        # Only the total is needed, not the deployments themselves
+        deployments = get_resource_list(self.client.deployments, 'Deployments', self.logger,
+                                        all_tenants=True, _include=['id'], _size=1)
+        total = deployments.metadata.pagination.total
+        assert total == expected_count
+        if len(self.deployments) != total:
+            self.reconcile_deployments()
 
     def _assert_blueprints_count(self, expected_count):
         self._assert_resources_count(
@@ -22,6 +22,31 @@ BLUEPRINT_TYPES = [
     AGENTLESS_BLUEPRINT
 ]
 
+DEFAULT_TENANT = 'default_tenant'
+
 TERMINATED_STATE = 'terminated'
+FAILED_STATE = 'failed'
+CANCELLED_STATE = 'cancelled'
+END_STATES = [TERMINATED_STATE, FAILED_STATE, CANCELLED_STATE]
+ACTIVE_STATES = ['pending', 'queued', 'started', 'cancelling', 'force_cancelling']
 
 PAGINATION_PARAMS = {'_offset': 0, '_size': 1000}
+
+# The manager's message broker, sampled during the agents' soak
+RABBITMQ_USERNAME = 'cloudify'
+RABBITMQ_PASSWORD = 'c10udify'
+MONITORING_EXCHANGE = 'cloudify-monitoring'
+
+# An operation of cloudify.nodes.Root without an implementation
+NOOP_OPERATION = 'cloudify.interfaces.lifecycle.start'
+
+MANAGER_DB_NAME = 'cloudify_db'
+
+# The manager's directories accounted for in the storage reports
+MANAGER_DIRECTORIES = {
+    'blueprints': '/opt/manager/resources/blueprints',
+    'uploaded_blueprints': '/opt/manager/resources/uploaded-blueprints',
+    'deployments': '/opt/manager/resources/deployments',
+    'file_server': '/opt/manager/resources',
+    'logs': '/var/log/cloudify'
+}
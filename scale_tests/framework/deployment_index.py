@@ -0,0 +1,98 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import threading
+
+from .tracing import tracer
+from .util import list_all_resources
+
+CREATED = 'created'
+INSTALLED = 'installed'
+UNINSTALLED = 'uninstalled'
+UNKNOWN = 'unknown'
+
+_INDEXED_FIELDS = ['id', 'blueprint_id', 'tenant_name']
+
+
+class DeploymentRecord(object):
+    """The few fields of a deployment the tests need"""
+
+    __slots__ = ('id', 'blueprint_id', 'tenant_name', 'status')
+
+    def __init__(self, deployment_id, blueprint_id, tenant_name, status):
+        self.id = deployment_id
+        self.blueprint_id = blueprint_id
+        self.tenant_name = tenant_name
+        self.status = status
+
+
+class DeploymentIndex(object):
+    """
+    A compact local index of the deployments, updated incrementally as they
+    are created and deleted, instead of listing all of them from the manager.
+    `reconcile` replaces it with the manager's deployments, on demand.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, deployment_id):
+        return deployment_id in self._records
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._records.values()))
+
+    def add(self, deployment_id, blueprint_id, tenant_name, status=CREATED):
+        with self._lock:
+            self._records[deployment_id] = DeploymentRecord(
+                deployment_id, blueprint_id, tenant_name, status)
+
+    def remove(self, deployment_id):
+        with self._lock:
+            self._records.pop(deployment_id, None)
+
+    def set_status(self, deployment_ids, status):
+        with self._lock:
+            for deployment_id in deployment_ids:
+                record = self._records.get(deployment_id)
+                if record is not None:
+                    record.status = status
+
+    def ids(self, tenant_name=None):
+        return [record.id for record in self
+                if tenant_name is None or record.tenant_name == tenant_name]
+
+    def reconcile(self, client, logger):
+        """Replaces the index with the manager's deployments, keeping known statuses"""
+        logger.info('Reconciling the deployments index with the manager')
+        records = {}
+        with tracer.span('deployments index reconcile', category='polling'):
+            for deployment in list_all_resources(client.deployments,
+                                                 _include=_INDEXED_FIELDS,
+                                                 _all_tenants=True):
+                known = self._records.get(deployment.id)
+                records[deployment.id] = DeploymentRecord(
+                    deployment.id,
+                    deployment.blueprint_id,
+                    deployment.get('tenant_name'),
+                    known.status if known else UNKNOWN)
+        with self._lock:
+            self._records = records
+        logger.info('The deployments index has {} deployments'.format(len(records)))
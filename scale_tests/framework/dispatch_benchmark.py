@@ -0,0 +1,282 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import threading
+from time import time, sleep
+from multiprocessing.pool import ThreadPool as Pool
+
+from .tracing import tracer
+from .util import summarize_durations, list_all_resources
+from .constants import TERMINATED_STATE, END_STATES, ACTIVE_STATES, PAGINATION_PARAMS
+
+STARTED_STATE = 'started'
+POLLING_INTERVAL = 1
+EXECUTIONS_TIMEOUT = 60 * 60
+
+# How many execution ids to filter by in a single list request
+_IDS_CHUNK_SIZE = 100
+
+
+class _ExecutionRecord(object):
+    """The transition times of one execution, as observed by the harness"""
+
+    __slots__ = ('deployment_id', 'execution_id', 'submitted', 'start_returned',
+                 'queued', 'started', 'ended', 'status')
+
+    def __init__(self, deployment_id):
+        self.deployment_id = deployment_id
+        self.execution_id = None
+        self.submitted = None
+        self.start_returned = None
+        self.queued = None
+        self.started = None
+        self.ended = None
+        self.status = None
+
+    def observe(self, status, observed_time):
+        self.status = status
+        if status in END_STATES:
+            self.ended = self.ended or observed_time
+        elif status == STARTED_STATE:
+            self.started = self.started or observed_time
+        else:
+            self.queued = self.queued or observed_time
+
+    def end(self, observed_time):
+        self.ended = self.ended or observed_time
+
+    @property
+    def dispatched(self):
+        # An execution may end between two polls without being seen started,
+        # its end is then the best known bound of its dispatch
+        return self.started or self.ended
+
+    @property
+    def queue_wait(self):
+        if self.dispatched is None:
+            return None
+        return self.dispatched - self.submitted
+
+    @property
+    def latency(self):
+        if self.ended is None:
+            return None
+        return self.ended - self.submitted
+
+    @property
+    def run_time(self):
+        if self.started is None or self.ended is None:
+            return None
+        return self.ended - self.started
+
+
+class _Submission(object):
+    """Submits executions at a fixed rate in the background"""
+
+    def __init__(self, name, records, rate, start, threads_count):
+        self.name = name
+        self.records = records
+        self.rate = rate
+        self.start = start
+        self._pool = Pool(processes=threads_count)
+        self._results = []
+        self._thread = threading.Thread(target=self._submit)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _submit(self):
+        start_time = time()
+        for index, record in enumerate(self.records):
+            if self.rate:
+                sleep(max(0, start_time + float(index) / self.rate - time()))
+            self._results.append(self._pool.apply_async(self._start_execution, (record,)))
+        self._pool.close()
+
+    def _start_execution(self, record):
+        record.submitted = time()
+        with tracer.span(self.name, category='http', resource_id=record.deployment_id):
+            record.execution_id = self.start(record.deployment_id)
+        record.start_returned = time()
+
+    def done(self):
+        return not self._thread.is_alive() and all(r.ready() for r in self._results)
+
+    def join(self):
+        self._thread.join()
+        self._pool.join()
+
+        # Raise the first error of the start calls, if any
+        for result in self._results:
+            result.get()
+
+
+class WorkflowDispatchBenchmark(object):
+    """
+    Submits executions at a fixed rate (or all at once when the rate is None)
+    and records, per execution, when it was seen queued, started and ended.
+    The executions are polled every POLLING_INTERVAL seconds from the first
+    submission on, which bounds the times' resolution. Only the workflow's
+    active executions are polled, an execution which is no longer listed has
+    ended.
+    """
+
+    def __init__(self, client, logger, threads_count=100, timeout=EXECUTIONS_TIMEOUT):
+        self.client = client
+        self.logger = logger
+        self.threads_count = threads_count
+        self.timeout = timeout
+
+    def run(self, workflow_id, deployment_ids, rate, **start_kwargs):
+        def _start_execution(deployment_id):
+            return self.client.executions.start(
+                deployment_id, workflow_id, **start_kwargs).id
+        return self.run_operation(
+            workflow_id, workflow_id, deployment_ids, rate, _start_execution)
+
+    def run_operation(self, name, workflow_id, deployment_ids, rate, start):
+        """
+        Runs an operation on every deployment, `start(deployment_id)` starts
+        the operation and returns the id of the `workflow_id` execution it runs
+        """
+        self.logger.info('Starting {0} {1} executions {2}...'.format(
+            len(deployment_ids), name, _format_rate(rate)))
+        records = [_ExecutionRecord(deployment_id) for deployment_id in deployment_ids]
+        submission = _Submission(name, records, rate, start, self.threads_count)
+        self._wait_for_executions(workflow_id, records, submission)
+        self._update_end_statuses(records)
+        result = self._summarize(name, rate, records)
+        self.logger.info(
+            '{0} {1}: dispatched {2:.2f} executions per second, '
+            'queue wait p50 {3}, run time p50 {4}'.format(
+                name, _format_rate(rate), result['dispatch_throughput'],
+                _format_seconds(result['queue_wait']),
+                _format_seconds(result['run_time'])))
+        return result
+
+    def _wait_for_executions(self, workflow_id, records, submission):
+        """Polls the executions while they are submitted, until all of them ended"""
+        deadline = time() + self.timeout
+        submitted = False
+        while True:
+            # Executions started after the list call are polled on the next round
+            if not submitted and submission.done():
+                submission.join()
+                submitted = True
+                self.logger.info('Waiting for {} executions to end'.format(len(records)))
+            pending = [record for record in records
+                       if record.execution_id is not None and record.ended is None]
+            if submitted and not pending:
+                break
+            if pending:
+                self._observe(workflow_id, pending)
+                pending = [record for record in pending if record.ended is None]
+            if (pending or not submitted) and time() > deadline:
+                raise AssertionError(
+                    '{0} {1} executions did not end within {2} seconds: {3}'.format(
+                        len(pending), workflow_id, self.timeout,
+                        ', '.join('{0} ({1})'.format(record.execution_id, record.status)
+                                  for record in pending)))
+            sleep(POLLING_INTERVAL)
+        self.logger.info('All the executions ended')
+
+    def _observe(self, workflow_id, records):
+        observed_time = time()
+        active = dict((execution.id, execution.status)
+                      for execution in self._list_active_executions(workflow_id))
+        for record in records:
+            if record.execution_id in active:
+                record.observe(active[record.execution_id], observed_time)
+            else:
+                record.end(observed_time)
+
+    @tracer.traced(category='polling')
+    def _list_active_executions(self, workflow_id):
+        return list(list_all_resources(self.client.executions,
+                                       _include=['id', 'status'],
+                                       workflow_id=workflow_id,
+                                       status=ACTIVE_STATES))
+
+    def _update_end_statuses(self, records):
+        """Gets the end statuses of the executions, which are not polled once ended"""
+        records_by_id = dict((record.execution_id, record) for record in records)
+        execution_ids = list(records_by_id)
+        for index in range(0, len(execution_ids), _IDS_CHUNK_SIZE):
+            chunk = execution_ids[index:index + _IDS_CHUNK_SIZE]
+            executions = self.client.executions.list(_include=['id', 'status'],
+                                                     id=chunk,
+                                                     _offset=0,
+                                                     _size=PAGINATION_PARAMS['_size'])
+            for execution in executions:
+                records_by_id[execution.id].status = execution.status
+
+    def _summarize(self, name, rate, records):
+        dispatched = [record.dispatched for record in records
+                      if record.dispatched is not None]
+        first_submitted = min(record.submitted for record in records)
+        last_submitted = max(record.submitted for record in records)
+        dispatch_window = max(dispatched) - first_submitted if dispatched else None
+        failed_executions = ['{0} ({1})'.format(r.execution_id, r.status)
+                             for r in records if r.status != TERMINATED_STATE]
+        return {
+            'workflow_id': name,
+            'rate': rate,
+            'executions': len(records),
+            'failed': len(failed_executions),
+            'failed_executions': failed_executions,
+            'submission_rate': _per_second(len(records), last_submitted - first_submitted),
+            'dispatch_throughput': _per_second(len(dispatched), dispatch_window),
+            'start_call': summarize_durations(
+                r.start_returned - r.submitted for r in records),
+            'queue_wait': summarize_durations(r.queue_wait for r in records),
+            'run_time': summarize_durations(r.run_time for r in records),
+            'latency': summarize_durations(r.latency for r in records),
+            'executions_transitions': [
+                dict((slot, getattr(r, slot)) for slot in _ExecutionRecord.__slots__)
+                for r in records
+            ]
+        }
+
+
+def _per_second(count, seconds):
+    if not seconds:
+        return 0.0
+    return count / seconds
+
+
+def _format_rate(rate):
+    if not rate:
+        return 'all at once'
+    return 'at {} per second'.format(rate)
+
+
+def _format_seconds(durations):
+    if durations is None:
+        return 'N/A'
+    return '{0:.2f} seconds'.format(durations['p50'])
+
+
+def assert_executions_succeeded(result):
+    assert result['failed'] == 0, '{0} of {1} {2} executions failed: {3}'.format(
+        result['failed'], result['executions'], result['workflow_id'],
+        ', '.join(result['failed_executions']))
+
+
+def save_dispatch_report(results_dir, results, file_name='workflow-dispatch.json'):
+    report_path = os.path.join(results_dir, file_name)
+    with open(report_path, 'w') as report_file:
+        json.dump(results, report_file, indent=2)
+    return report_path
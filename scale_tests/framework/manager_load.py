@@ -0,0 +1,202 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import glob
+import json
+from time import time, sleep
+
+from .manager_session import (ManagerSession,
+                              PROCESS_STATS_COMMAND,
+                              parse_process_stats)
+from .constants import (RABBITMQ_USERNAME,
+                        RABBITMQ_PASSWORD,
+                        MONITORING_EXCHANGE)
+
+_SECTION_PREFIX = '##'
+
+# One command per sample, so that every sample costs a single remote call
+_SAMPLE_COMMAND = '; '.join([
+    "echo '##queues'",
+    'rabbitmqctl list_queues -q name messages',
+    "echo '##cpu'",
+    'head -1 /proc/stat',
+    "echo '##processes'",
+    PROCESS_STATS_COMMAND,
+    "echo '##monitoring'",
+    'curl -s -k -u {0}:{1} https://localhost:15671/api/exchanges/%2F/{2}'.format(
+        RABBITMQ_USERNAME, RABBITMQ_PASSWORD, MONITORING_EXCHANGE)
+])
+
+
+class ManagerLoadSampler(object):
+    """
+    Samples the load on a manager: the message broker's queue depths, the
+    metrics ingestion rate, CPU and RSS, and the latency of probe requests
+    """
+
+    def __init__(self, manager, logger):
+        self.logger = logger
+        self.session = ManagerSession.for_manager(manager)
+        self.client = manager.client
+        self._last_cpu = None
+
+    def soak(self, duration, interval):
+        """Samples the manager every `interval` seconds for `duration` seconds"""
+        self.logger.info('Sampling the manager load for {0} seconds...'.format(duration))
+        samples = []
+        start_time = time()
+        while time() - start_time < duration:
+            sample_start = time()
+            sample = self.sample()
+            sample['time'] = sample_start - start_time
+            samples.append(sample)
+            sleep(max(0, interval - (time() - sample_start)))
+        self.logger.info('Sampled the manager load {0} times'.format(len(samples)))
+        return samples
+
+    def sample(self):
+        output = self.session.run(_SAMPLE_COMMAND, sudo=True, warn_only=True)
+        sections = _split_sections(output)
+        queues = _parse_queues(sections.get('queues', []))
+        return {
+            'queues': queues,
+            'queued_messages': sum(queues.values()),
+            'metrics_rate': _parse_publish_rate(sections.get('monitoring', [])),
+            'cpu_percent': self._cpu_percent(sections.get('cpu', [])),
+            'rss': _rss_by_name(parse_process_stats('\n'.join(sections.get('processes', [])))),
+            'probe_latency': self._probe_latency()
+        }
+
+    def _cpu_percent(self, lines):
+        # /proc/stat is cumulative, so the first sample has no value
+        if not lines:
+            return None
+        values = [int(value) for value in lines[0].split()[1:]]
+        idle, total = values[3] + values[4], sum(values)
+        last_cpu, self._last_cpu = self._last_cpu, (idle, total)
+        if last_cpu is None or total == last_cpu[1]:
+            return None
+        return 100.0 * (1 - float(idle - last_cpu[0]) / (total - last_cpu[1]))
+
+    def _probe_latency(self):
+        start_time = time()
+        self.client.manager.get_status()
+        status_time = time()
+        self.client.deployments.list(_include=['id'], _offset=0, _size=1)
+        end_time = time()
+        return {
+            'status': status_time - start_time,
+            'deployments_list': end_time - status_time
+        }
+
+
+def summarize_samples(samples):
+    def _stats(values):
+        values = [value for value in values if value is not None]
+        if not values:
+            return None
+        return {'mean': sum(values) / float(len(values)), 'max': max(values)}
+
+    return {
+        'samples': len(samples),
+        'queued_messages': _stats(s['queued_messages'] for s in samples),
+        'metrics_rate': _stats(s['metrics_rate'] for s in samples),
+        'cpu_percent': _stats(s['cpu_percent'] for s in samples),
+        'rss_total': _stats(sum(s['rss'].values()) for s in samples),
+        'status_latency': _stats(s['probe_latency']['status'] for s in samples),
+        'deployments_list_latency': _stats(
+            s['probe_latency']['deployments_list'] for s in samples)
+    }
+
+
+def save_soak_report(results_dir, blueprint_type, deployments_count, samples):
+    report = {
+        'blueprint_type': blueprint_type,
+        'deployments_count': deployments_count,
+        'summary': summarize_samples(samples),
+        'samples': samples
+    }
+    report_path = os.path.join(results_dir, 'soak-{}.json'.format(blueprint_type))
+    with open(report_path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    return report_path
+
+
+def log_soak_comparison(results_dir, logger):
+    """
+    Logs the summaries of all the soak reports in the results directory and
+    in its subdirectories, which are the shards' results directories
+    """
+    report_paths = glob.glob(os.path.join(results_dir, 'soak-*.json')) + \
+        glob.glob(os.path.join(results_dir, '*', 'soak-*.json'))
+    reports = []
+    for report_path in sorted(report_paths):
+        with open(report_path) as report_file:
+            reports.append(json.load(report_file))
+    if not reports:
+        return
+
+    logger.info('Manager load by blueprint type (mean / max):')
+    for report in reports:
+        summary = report['summary']
+        logger.info('{0} ({1} deployments): {2}'.format(
+            report['blueprint_type'], report['deployments_count'],
+            ', '.join('{0}: {1}'.format(key, _format_stats(summary[key]))
+                      for key in sorted(summary) if key != 'samples')))
+
+
+def _format_stats(stats):
+    if stats is None:
+        return 'N/A'
+    return '{0:.2f} / {1:.2f}'.format(stats['mean'], stats['max'])
+
+
+def _split_sections(output):
+    sections = {}
+    current = None
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith(_SECTION_PREFIX):
+            current = sections.setdefault(line[len(_SECTION_PREFIX):], [])
+        elif line and current is not None:
+            current.append(line)
+    return sections
+
+
+def _parse_queues(lines):
+    queues = {}
+    for line in lines:
+        fields = line.split()
+        if len(fields) == 2 and fields[1].isdigit():
+            queues[fields[0]] = int(fields[1])
+    return queues
+
+
+def _rss_by_name(processes):
+    """RSS in bytes, by process name"""
+    rss = {}
+    for process in processes:
+        rss[process['name']] = rss.get(process['name'], 0) + process['rss']
+    return rss
+
+
+def _parse_publish_rate(lines):
+    # The management API is not always available, the rate is optional
+    try:
+        exchange = json.loads(''.join(lines))
+        return exchange['message_stats']['publish_in_details']['rate']
+    except (ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,209 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import select
+import threading
+
+import paramiko
+from fabric.api import env
+
+from .tracing import tracer
+from .constants import MANAGER_DB_NAME
+
+try:
+    from shlex import quote
+except ImportError:
+    from pipes import quote
+
+PROCESS_STATS_COMMAND = 'ps -eo pid=,pcpu=,rss=,comm='
+
+_RECV_BUFFER_SIZE = 32768
+_KEEPALIVE_INTERVAL = 30
+
+
+class ManagerCommandError(Exception):
+    pass
+
+
+class ManagerSession(object):
+    """
+    A persistent SSH connection to a manager. Every command runs on its own
+    channel of the same connection, so that commands are cheap (no handshake)
+    and threads can share the session.
+    Use `for_manager` for getting the manager's shared session.
+    """
+
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, manager):
+        # The manager's fabric settings hold the credentials it is reached with
+        with manager.ssh():
+            username, key_filename = env.user, env.key_filename
+        self.host = manager.ip_address
+        self._client = paramiko.SSHClient()
+        self._client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        self._client.connect(self.host, username=username, key_filename=key_filename)
+        self._client.get_transport().set_keepalive(_KEEPALIVE_INTERVAL)
+
+    @classmethod
+    def for_manager(cls, manager):
+        with cls._sessions_lock:
+            session = cls._sessions.get(manager.ip_address)
+            if session is None:
+                session = cls._sessions[manager.ip_address] = cls(manager)
+            return session
+
+    @classmethod
+    def close_for(cls, manager):
+        with cls._sessions_lock:
+            session = cls._sessions.pop(manager.ip_address, None)
+        if session is not None:
+            session.close()
+
+    def close(self):
+        self._client.close()
+
+    def run(self, command, sudo=False, warn_only=False, sudo_user=None, label=None):
+        """
+        Runs a command on the manager and returns its output. Commands run with
+        sudo get a pty, as sudo may require a tty, which merges their stderr
+        into their output.
+        The `label` replaces the command in the trace and in errors, for
+        commands which hold secrets
+        """
+        if sudo:
+            command = 'sudo -n {0}sh -c {1}'.format(
+                '-u {} '.format(sudo_user) if sudo_user else '', quote(command))
+        label = label or command
+        with tracer.span('ssh', category='ssh', resource_id=self.host) as span:
+            exit_status, output, error = self._exec(command, pty=sudo)
+            if span is not None:
+                span.args['command'] = label
+        if exit_status != 0 and not warn_only:
+            raise ManagerCommandError('`{0}` failed on {1} with exit status {2}: {3}'.format(
+                label, self.host, exit_status, (error or output).strip()))
+        return output
+
+    def disk_usage(self, path='/'):
+        """Size, used and available bytes of the file system of a path"""
+        output = self.run('df -P -B1 {}'.format(quote(path)))
+        fields = output.splitlines()[-1].split()
+        return {
+            'file_system': fields[0],
+            'size': int(fields[1]),
+            'used': int(fields[2]),
+            'available': int(fields[3]),
+            'mount_point': fields[5]
+        }
+
+    def process_stats(self, names=None):
+        """CPU percent and RSS bytes of the processes, optionally by name"""
+        return parse_process_stats(self.run(PROCESS_STATS_COMMAND), names)
+
+    def db_table_sizes(self):
+        """
+        Sizes in bytes of the manager's database tables and their indexes, and
+        their estimated rows counts (PostgreSQL's statistics, which may lag)
+        """
+        query = ('SELECT relname, pg_total_relation_size(relid), pg_relation_size(relid), '
+                 'pg_indexes_size(relid), n_live_tup FROM pg_stat_user_tables')
+        output = self._psql(query)
+        tables = {}
+        for line in output.splitlines():
+            fields = line.split(',')
+            if len(fields) != 5:
+                continue
+            tables[fields[0]] = {
+                'total_bytes': int(fields[1]),
+                'table_bytes': int(fields[2]),
+                'indexes_bytes': int(fields[3]),
+                'estimated_rows': int(fields[4])
+            }
+        return tables
+
+    def db_rows_counts(self, table_names):
+        """Exact rows counts of the manager's database tables"""
+        query = ' UNION ALL '.join(
+            "SELECT '{0}', count(*) FROM {0}".format(table_name) for table_name in table_names)
+        output = self._psql(query)
+        counts = {}
+        for line in output.splitlines():
+            fields = line.split(',')
+            if len(fields) == 2 and fields[1].isdigit():
+                counts[fields[0]] = int(fields[1])
+        return counts
+
+    def directory_sizes(self, paths):
+        """Size in bytes of every directory, missing directories are skipped"""
+        # One du per directory, as du counts nested directories only once
+        command = '; '.join('du -sb -- {}'.format(quote(path)) for path in paths)
+        output = self.run(command, sudo=True, warn_only=True)
+        sizes = {}
+        for line in output.splitlines():
+            fields = line.split(None, 1)
+            if len(fields) == 2 and fields[0].isdigit():
+                sizes[fields[1]] = int(fields[0])
+        return sizes
+
+    def _psql(self, query):
+        """Runs a query on the manager's database, one comma separated row per line"""
+        # The pty of sudo would otherwise make psql page its output
+        return self.run('psql -d {0} -P pager=off -At -F , -c {1}'.format(
+            MANAGER_DB_NAME, quote(query)), sudo=True, sudo_user='postgres')
+
+    def _exec(self, command, pty=False):
+        channel = self._client.get_transport().open_session()
+        try:
+            if pty:
+                channel.get_pty()
+            channel.exec_command(command)
+            output, error = [], []
+
+            # Reading both streams as they come, so neither fills its window
+            while True:
+                select.select([channel], [], [], 1)
+                while channel.recv_ready():
+                    output.append(channel.recv(_RECV_BUFFER_SIZE))
+                while channel.recv_stderr_ready():
+                    error.append(channel.recv_stderr(_RECV_BUFFER_SIZE))
+                if channel.exit_status_ready() and not channel.recv_ready() \
+                        and not channel.recv_stderr_ready():
+                    break
+            return (channel.recv_exit_status(),
+                    _decode(b''.join(output)),
+                    _decode(b''.join(error)))
+        finally:
+            channel.close()
+
+
+def parse_process_stats(output, names=None):
+    """Parses the output of PROCESS_STATS_COMMAND, optionally keeping some names"""
+    processes = []
+    for line in output.splitlines():
+        fields = line.split(None, 3)
+        if len(fields) != 4 or (names and fields[3] not in names):
+            continue
+        processes.append({
+            'pid': int(fields[0]),
+            'cpu_percent': float(fields[1]),
+            'rss': int(fields[2]) * 1024,
+            'name': fields[3]
+        })
+    return processes
+
+
+def _decode(data):
+    return data.decode('utf-8', 'replace')
@@ -0,0 +1,147 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import pstats
+import cProfile
+import threading
+from time import time
+from functools import wraps
+from contextlib import contextmanager
+
+
+class _Phase(object):
+
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+        self.profiles = []
+        self.wall_time = None
+        self.cpu_time = None
+        self.profile_path = None
+
+    def to_dict(self):
+        return {
+            'phase': self.name,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'profile': self.profile_path
+        }
+
+
+class HarnessProfiler(object):
+    """
+    Profiles the harness itself during each phase of the tests, so that the
+    client side cost (YAML parsing, archiving, deserialization...) can be
+    told apart from the manager's.
+    A phase is profiled on the thread which runs it and on every pool thread
+    running a function wrapped with `profiled`. Phases don't nest, a phase
+    started inside another one is accounted to the outer phase.
+    Disabled by default, until `enable` is called.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.output_dir = None
+        self.logger = None
+        self.phases = []
+        self._current = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self, output_dir, logger):
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        self.output_dir = output_dir
+        self.logger = logger
+        self.enabled = True
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled or self._current is not None:
+            yield
+            return
+
+        phase = _Phase(len(self.phases), name)
+        self._current = phase
+        cpu_start = _cpu_time()
+        start_time = time()
+        profile = self._thread_profile(phase)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            phase.wall_time = time() - start_time
+            phase.cpu_time = _cpu_time() - cpu_start
+            self._current = None
+            self._save(phase)
+
+    def profiled(self, function):
+        """Wraps a function which is run by a pool during a phase"""
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            phase = self._current
+            if phase is None:
+                return function(*args, **kwargs)
+
+            profile = self._thread_profile(phase)
+            profile.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.disable()
+        return wrapper
+
+    def save_summary(self):
+        summary_path = os.path.join(self.output_dir, 'summary.json')
+        with open(summary_path, 'w') as summary_file:
+            json.dump([phase.to_dict() for phase in self.phases], summary_file, indent=2)
+        return summary_path
+
+    def _thread_profile(self, phase):
+        # Every thread gets its own profile, as cProfile only hooks the
+        # thread it was enabled on
+        if getattr(self._local, 'phase', None) is not phase:
+            self._local.phase = phase
+            self._local.profile = cProfile.Profile()
+            with self._lock:
+                phase.profiles.append(self._local.profile)
+        return self._local.profile
+
+    def _save(self, phase):
+        file_name = '{0:03d}-{1}'.format(phase.index, phase.name.replace(' ', '_'))
+        phase.profile_path = os.path.join(self.output_dir, file_name + '.prof')
+        with self._lock:
+            profiles = list(phase.profiles)
+        stats = pstats.Stats(*profiles)
+        stats.dump_stats(phase.profile_path)
+        with open(os.path.join(self.output_dir, file_name + '.txt'), 'w') as stats_file:
+            stats.stream = stats_file
+            stats.sort_stats('cumulative').print_stats(50)
+        self.phases.append(phase)
+        self.logger.info('{0} took {1:.2f} seconds wall time, {2:.2f} seconds of '
+                         'client CPU time'.format(phase.name, phase.wall_time, phase.cpu_time))
+
+
+def _cpu_time():
+    # User and system time of all the harness' threads
+    times = os.times()
+    return times[0] + times[1]
+
+
+# The profiler shared by the framework and the tests, enabled with `--profile-harness`
+profiler = HarnessProfiler()
@@ -0,0 +1,207 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Runs the scale tests as shards concurrently, each shard on its own manager.
+
+A shard is a test module with its options, e.g. agents_test.py with
+--blueprint-type=agentless. Every shard runs in its own pytest process, which
+provisions its own manager, and at most `--managers` shards run at once.
+The results of all the shards are merged into one report, recording the
+manager each result was produced on.
+
+    python -m scale_tests.framework.sharding --managers 3 -- --deployments-count=100
+"""
+
+import os
+import sys
+import glob
+import json
+import logging
+import argparse
+import threading
+import subprocess
+from time import time
+from xml.etree import ElementTree
+from multiprocessing.pool import ThreadPool as Pool
+
+from .constants import BLUEPRINT_TYPES
+from .manager_load import log_soak_comparison
+
+SHARD_ENV_VAR = 'SCALE_TESTS_SHARD'
+MANAGERS_FILE = 'managers.json'
+REPORT_FILE = 'report.json'
+JUNIT_FILE = 'junit.xml'
+TRACE_FILE = 'trace.json'
+
+_managers_lock = threading.Lock()
+
+
+def record_manager(results_dir, module_name, manager, attributes):
+    """Records the manager a test module runs on, in the results directory"""
+    managers_path = os.path.join(results_dir, MANAGERS_FILE)
+    with _managers_lock:
+        managers = _load_json(managers_path, default={})
+        managers[module_name] = {
+            'shard': os.environ.get(SHARD_ENV_VAR),
+            'ip_address': manager.ip_address,
+            'datadog_hostname': datadog_hostname(manager),
+            'flavor': attributes.get('manager_server_flavor_name')
+        }
+        with open(managers_path, 'w') as managers_file:
+            json.dump(managers, managers_file, indent=2)
+
+
+def datadog_hostname(manager):
+    """The host name the manager reports to Datadog with, unique per shard"""
+    name = os.environ.get(SHARD_ENV_VAR) or manager.ip_address
+    return 'scale-tests-{}'.format(
+        ''.join(c if c.isalnum() else '-' for c in name).lower())
+
+
+def default_shards(tests_dir):
+    """One shard per test module, and one per blueprint type for agents_test"""
+    shards = []
+    for module_path in sorted(glob.glob(os.path.join(tests_dir, '*_test.py'))):
+        module = os.path.basename(module_path)
+        if module == 'agents_test.py':
+            shards.extend([module, '--blueprint-type={}'.format(blueprint_type)]
+                          for blueprint_type in BLUEPRINT_TYPES)
+        else:
+            shards.append([module])
+    return shards
+
+
+def run_shards(shards, managers_count, results_dir, pytest_args, tests_dir):
+    """Runs the shards, at most `managers_count` at a time, and merges their results"""
+    pool = Pool(processes=managers_count)
+    shard_results = pool.map(
+        lambda shard: _run_shard(shard, results_dir, pytest_args, tests_dir), shards)
+    pool.close()
+    pool.join()
+    report = {'shards': shard_results}
+    with open(os.path.join(results_dir, REPORT_FILE), 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    return report
+
+
+def _run_shard(shard, results_dir, pytest_args, tests_dir):
+    shard_name = _shard_name(shard)
+    shard_dir = os.path.join(results_dir, shard_name)
+    if not os.path.isdir(shard_dir):
+        os.makedirs(shard_dir)
+
+    command = [sys.executable, '-m', 'pytest', '-s'] + shard + pytest_args + [
+        '--results-dir={}'.format(shard_dir),
+        '--junitxml={}'.format(os.path.join(shard_dir, JUNIT_FILE))]
+    environment = dict(os.environ)
+    environment[SHARD_ENV_VAR] = shard_name
+    start_time = time()
+    with open(os.path.join(shard_dir, 'output.log'), 'w') as output_file:
+        return_code = subprocess.call(command, cwd=tests_dir, env=environment,
+                                      stdout=output_file, stderr=subprocess.STDOUT)
+    return _shard_result(shard_name, shard, shard_dir, return_code, time() - start_time)
+
+
+def _shard_result(shard_name, shard, shard_dir, return_code, duration):
+    managers = _load_json(os.path.join(shard_dir, MANAGERS_FILE), default={})
+    # The trace is only meant for a trace viewer, and may be large
+    results = dict(
+        (os.path.basename(path), _load_json(path, default=None))
+        for path in sorted(glob.glob(os.path.join(shard_dir, '*.json')))
+        if os.path.basename(path) not in (MANAGERS_FILE, TRACE_FILE))
+    return {
+        'shard': shard_name,
+        'args': shard,
+        'return_code': return_code,
+        'duration': duration,
+        'managers': managers,
+        'tests': _junit_tests(os.path.join(shard_dir, JUNIT_FILE), managers),
+        'results': results
+    }
+
+
+def _junit_tests(junit_path, managers):
+    if not os.path.isfile(junit_path):
+        return []
+
+    tests = []
+    for test_case in ElementTree.parse(junit_path).getroot().iter('testcase'):
+        module_name = test_case.get('classname', '').split('.')[-1]
+        outcome = 'passed'
+        for child in test_case:
+            if child.tag in ('failure', 'error', 'skipped'):
+                outcome = child.tag
+        tests.append({
+            'name': test_case.get('name'),
+            'module': module_name,
+            'time': float(test_case.get('time', 0)),
+            'outcome': outcome,
+            'manager': managers.get(module_name, {}).get('ip_address')
+        })
+    return tests
+
+
+def _shard_name(shard):
+    name = '_'.join(arg.lstrip('-').replace('.py', '') for arg in shard)
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+
+
+def _load_json(path, default):
+    if not os.path.isfile(path):
+        return default
+    with open(path) as json_file:
+        return json.load(json_file)
+
+
+def main(argv=None):
+    tests_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(
+        description='Run the scale tests concurrently on several managers')
+    parser.add_argument('--managers', type=int, default=3,
+                        help='how many managers (and shards) to run concurrently')
+    parser.add_argument('--shard', action='append', dest='shards',
+                        help='a test module and its options, e.g. '
+                             '"agents_test.py --blueprint-type=agentless". '
+                             'Defaults to all the test modules')
+    parser.add_argument('--results-dir', default='scale-results',
+                        help='the directory the merged results are saved in')
+    parser.add_argument('pytest_args', nargs='*',
+                        help='options passed to every shard, after --')
+    args = parser.parse_args(argv)
+
+    results_dir = os.path.abspath(args.results_dir)
+    if not os.path.isdir(results_dir):
+        os.makedirs(results_dir)
+    shards = [shard.split() for shard in args.shards] if args.shards \
+        else default_shards(tests_dir)
+    report = run_shards(shards, args.managers, results_dir, args.pytest_args, tests_dir)
+
+    for shard_result in report['shards']:
+        print('{0}: {1} ({2:.2f} seconds)'.format(
+            shard_result['shard'],
+            'passed' if shard_result['return_code'] == 0 else 'failed',
+            shard_result['duration']))
+    print('The merged report was saved to {}'.format(
+        os.path.join(results_dir, REPORT_FILE)))
+
+    # Every agents_test shard soaked its own manager, in its own directory
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    log_soak_comparison(results_dir, logging.getLogger('scale_tests'))
+    return int(any(result['return_code'] for result in report['shards']))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
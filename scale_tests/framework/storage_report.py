@@ -0,0 +1,130 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+
+from .manager_session import ManagerSession
+from .constants import MANAGER_DIRECTORIES
+
+# The table each accounted resource is stored in
+RESOURCE_TABLES = {
+    'blueprint': 'blueprints',
+    'deployment': 'deployments',
+    'node_instance': 'node_instances'
+}
+
+
+class StorageAccounting(object):
+    """
+    Snapshots the manager's storage (database tables and indexes, resources
+    directories and logs) and reports how much it grew during a phase, in
+    total and per resource created.
+    The resources created are counted exactly from their tables' rows, the
+    tables' estimated rows are reported as they are.
+    """
+
+    def __init__(self, manager, results_dir, logger):
+        self.logger = logger
+        self.results_dir = results_dir
+        self.session = ManagerSession.for_manager(manager)
+
+    def snapshot(self):
+        directories = self.session.directory_sizes(MANAGER_DIRECTORIES.values())
+        return {
+            'disk': self.session.disk_usage('/'),
+            'tables': self.session.db_table_sizes(),
+            'resources': self.session.db_rows_counts(RESOURCE_TABLES.values()),
+            'directories': dict((name, directories.get(path, 0))
+                                for name, path in MANAGER_DIRECTORIES.items())
+        }
+
+    def report(self, phase_name, before, after):
+        """Reports the growth between two snapshots and saves it to the results directory"""
+        tables_growth = _tables_growth(before['tables'], after['tables'])
+        directories_growth = dict(
+            (name, after['directories'][name] - before['directories'].get(name, 0))
+            for name in after['directories'])
+        database_growth = sum(table['total_bytes'] for table in tables_growth.values())
+        created = dict((table_name, count - before['resources'].get(table_name, 0))
+                       for table_name, count in after['resources'].items())
+
+        # file_server contains the resources directories, the logs are apart
+        files_growth = directories_growth['file_server'] + directories_growth['logs']
+        report = {
+            'phase': phase_name,
+            'disk_used': after['disk']['used'] - before['disk']['used'],
+            'database': {
+                'total_bytes': database_growth,
+                'table_bytes': sum(t['table_bytes'] for t in tables_growth.values()),
+                'indexes_bytes': sum(t['indexes_bytes'] for t in tables_growth.values()),
+            },
+            'tables': tables_growth,
+            'directories': directories_growth,
+            'per_resource': _per_resource(tables_growth, created,
+                                          database_growth + files_growth)
+        }
+        self._log_report(report)
+        report_path = os.path.join(self.results_dir, 'storage-{}.json'.format(phase_name))
+        with open(report_path, 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        self.logger.info('The storage report was saved to {}'.format(report_path))
+        return report
+
+    def _log_report(self, report):
+        self.logger.info('{0} storage growth: {1} on disk, {2} in the database '
+                         '({3} in indexes), {4} of logs'.format(
+                             report['phase'],
+                             _format_bytes(report['disk_used']),
+                             _format_bytes(report['database']['total_bytes']),
+                             _format_bytes(report['database']['indexes_bytes']),
+                             _format_bytes(report['directories']['logs'])))
+        for resource, cost in sorted(report['per_resource'].items()):
+            self.logger.info('{0}: {1} created, {2} each in its table, {3} each overall'.format(
+                resource, cost['count'],
+                _format_bytes(cost['table_bytes']),
+                _format_bytes(cost['total_bytes'])))
+
+
+def _tables_growth(before, after):
+    growth = {}
+    for table_name, table in after.items():
+        previous = before.get(table_name, {})
+        growth[table_name] = dict((key, value - previous.get(key, 0))
+                                  for key, value in table.items())
+    return growth
+
+
+def _per_resource(tables_growth, created, total_growth):
+    """Bytes per resource created, of its own table and of the whole phase's growth"""
+    per_resource = {}
+    for resource, table_name in RESOURCE_TABLES.items():
+        count = created.get(table_name, 0)
+        if count <= 0:
+            continue
+        per_resource[resource] = {
+            'count': count,
+            'table_bytes': tables_growth.get(table_name, {}).get('total_bytes', 0) / float(count),
+            'total_bytes': total_growth / float(count)
+        }
+    return per_resource
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return '{0:.1f} {1}'.format(size, unit)
+        size /= 1024.0
+    return '{0:.1f} GB'.format(size)
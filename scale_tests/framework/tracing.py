@@ -0,0 +1,176 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import threading
+from time import time
+from functools import wraps
+from contextlib import contextmanager
+
+
+class Span(object):
+    """A single timed operation, as recorded by the Tracer"""
+
+    __slots__ = ('name', 'category', 'resource_id', 'thread_id', 'worker',
+                 'queued', 'start', 'end', 'args')
+
+    def __init__(self, name, category, resource_id=None, queued=None):
+        current_thread = threading.current_thread()
+        self.name = name
+        self.category = category
+        self.resource_id = resource_id
+        self.thread_id = current_thread.ident
+        self.worker = current_thread.name
+        self.queued = queued
+        self.start = time()
+        self.end = None
+        self.args = {}
+
+
+class Tracer(object):
+    """
+    Records the operations of the scale tests as spans, and exports them as
+    a Chrome trace (chrome://tracing, https://ui.perfetto.dev).
+    Disabled by default, recording spans is a no-op until `enable` is called.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def clear(self):
+        with self._lock:
+            self._spans = []
+
+    @property
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    @contextmanager
+    def span(self, name, category='operation', resource_id=None, queued=None):
+        if not self.enabled:
+            yield None
+            return
+
+        span = Span(name, category, resource_id, queued)
+        try:
+            yield span
+        except Exception as e:
+            span.args['error'] = repr(e)
+            raise
+        finally:
+            span.end = time()
+            with self._lock:
+                self._spans.append(span)
+
+    def traced(self, category='operation'):
+        """
+        A decorator recording every call of the function as a span.
+        When stacked under `retry`, every polling attempt is a separate span.
+        """
+        def decorator(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(function.__name__, category):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def queued(self, function, category='operation'):
+        """
+        Wraps a function which is run by a pool, so that the time every item
+        waited in the pool's queue is recorded along with the call itself.
+        The span's resource is the one the function returns (e.g. the id of the
+        created deployment), or the item itself when the function returns None.
+        The returned function expects `(queued_time, item)` tuples,
+        use `enqueue` for creating them right before submitting to the pool.
+        """
+        @wraps(function)
+        def wrapper(queued_item):
+            queued, item = queued_item
+            with self.span(function.__name__, category,
+                           resource_id=item, queued=queued) as span:
+                result = function(item)
+                if span is not None:
+                    span.args['item'] = _to_str(item)
+                    if result is not None:
+                        span.resource_id = result
+                return result
+        return wrapper
+
+    @staticmethod
+    def enqueue(iterable):
+        queued = time()
+        return [(queued, item) for item in iterable]
+
+    def to_chrome_trace(self):
+        """
+        Converts the spans to Chrome's trace event format.
+        Each span becomes a complete ('X') event on its thread's track,
+        preceded by a 'queued' event when the span waited in a pool.
+        """
+        pid = os.getpid()
+        events = []
+        workers = {}
+        for span in self.spans:
+            workers[span.thread_id] = span.worker
+            args = dict(span.args,
+                        resource_id=_to_str(span.resource_id),
+                        worker=span.worker)
+            if span.queued is not None:
+                args['queued_seconds'] = span.start - span.queued
+                events.append(_complete_event(
+                    'queued', 'queue', pid, span.thread_id,
+                    span.queued, span.start, {'resource_id': args['resource_id']}))
+            events.append(_complete_event(
+                span.name, span.category, pid, span.thread_id,
+                span.start, span.end, args))
+
+        for thread_id, worker in workers.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                           'tid': thread_id, 'args': {'name': worker}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path):
+        with open(path, 'w') as trace_file:
+            json.dump(self.to_chrome_trace(), trace_file)
+        return path
+
+
+def _complete_event(name, category, pid, thread_id, start, end, args):
+    return {
+        'name': name,
+        'cat': category,
+        'ph': 'X',
+        'pid': pid,
+        'tid': thread_id,
+        'ts': int(start * 1e6),
+        'dur': int((end - start) * 1e6),
+        'args': args
+    }
+
+
+def _to_str(value):
+    return value if value is None else str(value)
+
+
+# The tracer shared by the framework and the tests, enabled with `--trace`
+tracer = Tracer()
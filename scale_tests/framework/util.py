@@ -16,36 +16,77 @@
 from time import time
 from retrying import retry
 
+from .tracing import tracer
+from .profiling import profiler
+from .manager_session import ManagerSession
 from .constants import TERMINATED_STATE, PAGINATION_PARAMS
 
 
 def check_disk_space(manager, logger):
-    logger.info('The manager disk space :')
-    with manager.ssh() as fabric_ssh:
-        fabric_ssh.run('df -h /')
+    disk_usage = ManagerSession.for_manager(manager).disk_usage('/')
+    logger.info('The manager disk space : {0:.2f} GB used, {1:.2f} GB available ({2:.1f}%)'
+                .format(disk_usage['used'] / 1e9, disk_usage['available'] / 1e9,
+                        100.0 * disk_usage['used'] / disk_usage['size']))
+    return disk_usage
 
 
-def get_resource_list(resource_client, resource_name, logger, all_tenants=False):
+def get_resource_list(resource_client, resource_name, logger, all_tenants=False,
+                      **list_kwargs):
     start_time = time()
-    resource_list = resource_client.list(_all_tenants=all_tenants,
-                                         **PAGINATION_PARAMS)
+    phase_name = '{0} list'.format(resource_name)
+    list_params = dict(PAGINATION_PARAMS, **list_kwargs)
+    with tracer.span(phase_name, category='polling'), profiler.phase(phase_name):
+        resource_list = resource_client.list(_all_tenants=all_tenants, **list_params)
     end_time = time()
     logger.info('{0} list took {1:.2f} seconds'.format(resource_name,
                                                        end_time - start_time))
     return resource_list
 
 
+def list_all_resources(resource_client, **list_kwargs):
+    """Yields all the resources of a list, page by page"""
+    offset = 0
+    while True:
+        page = resource_client.list(_offset=offset,
+                                    _size=PAGINATION_PARAMS['_size'],
+                                    **list_kwargs)
+        for resource in page:
+            yield resource
+        offset += len(page)
+        if not page or offset >= page.metadata.pagination.total:
+            return
+
+
+def summarize_durations(durations):
+    """Count, mean, median, 95th percentile and max of a list of durations"""
+    durations = sorted(duration for duration in durations if duration is not None)
+    if not durations:
+        return None
+    return {
+        'count': len(durations),
+        'mean': sum(durations) / len(durations),
+        'p50': _percentile(durations, 50),
+        'p95': _percentile(durations, 95),
+        'max': durations[-1]
+    }
+
+
+def _percentile(sorted_values, percent):
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
 def create_one_deployment(resource_creator, blueprint_id, logger):
     logger.info('Creating 1 deployment...')
     start_time = time()
     deployment_id = resource_creator.create_deployment(blueprint_id=blueprint_id)
     _wait_for_deployment_executions(deployment_id, resource_creator.client, logger)
-    resource_creator.deployments = None
     end_time = time()
     logger.info('Created 1 deploymet in {0:.2f} seconds'.format(end_time - start_time))
 
 
 @retry(stop_max_attempt_number=10, wait_fixed=1000)
+@tracer.traced(category='polling')
 def _wait_for_deployment_executions(deployment_id, manager_client, logger):
     logger.info('Waiting for active executions of deployment_id {}'.format(deployment_id))
     executions = manager_client.executions.list(deployment_id=deployment_id,
@@ -0,0 +1,165 @@
+########
+# Copyright (c) 2017 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from time import time
+
+from .framework import util
+from .framework.dispatch_benchmark import (WorkflowDispatchBenchmark,
+                                           assert_executions_succeeded,
+                                           save_dispatch_report)
+
+SCALE_BLUEPRINT = 'blueprint-examples/scale-blueprint.yaml'
+SCALE_UPDATE_BLUEPRINT = 'blueprint-examples/scale-update-blueprint.yaml'
+
+# Scaling the host scales everything contained in it
+SCALABLE_ENTITY = 'host'
+
+
+def test_scale_workflows(resource_creator, deployments_count, results_dir, request, logger):
+    """
+    Test scale and heal workflows on many deployments with growing topologies
+    """
+    start_time = time()
+    threads_count = deployments_count
+    client = resource_creator.client
+    benchmark = WorkflowDispatchBenchmark(client, logger, threads_count)
+    deployment_ids = _install_scale_deployments(resource_creator, deployments_count)
+
+    results = []
+    for delta in _init_scale_deltas(request):
+        results.append(_scale_deployments(benchmark, client, deployment_ids, delta, logger))
+        results.append(_heal_deployments(benchmark, client, deployment_ids, logger))
+        results.append(_scale_deployments(benchmark, client, deployment_ids, -delta, logger))
+    report_path = save_dispatch_report(results_dir, results, 'scale-workflows.json')
+    logger.info('The scale workflows report was saved to {}'.format(report_path))
+    _log_latencies(results, logger)
+
+    resource_creator.uninstall_all_deployments(threads_count)
+    resource_creator.delete_all_deployments(threads_count)
+    end_time = time()
+    logger.info('{0} took {1:.2f} seconds'.format(
+        'test_scale_workflows', end_time - start_time))
+
+
+def test_bulk_deployment_updates(resource_creator, deployments_count, results_dir, request,
+                                 logger):
+    """
+    Test concurrent deployment updates of many deployments with growing topologies
+    """
+    start_time = time()
+    threads_count = deployments_count
+    client = resource_creator.client
+    benchmark = WorkflowDispatchBenchmark(client, logger, threads_count)
+    deployment_ids = _install_scale_deployments(resource_creator, deployments_count)
+    blueprint_example = resource_creator.blueprint_example
+    update_blueprint_path = blueprint_example.resource_path(SCALE_UPDATE_BLUEPRINT)
+    scale_blueprint_path = blueprint_example.resource_path(SCALE_BLUEPRINT)
+
+    results = []
+    for delta in _init_scale_deltas(request):
+        results.append(_scale_deployments(benchmark, client, deployment_ids, delta, logger))
+
+        # Adding haproxy and removing it, on the grown topology
+        for blueprint_path in (update_blueprint_path, scale_blueprint_path):
+            results.append(_update_deployments(
+                benchmark, client, deployment_ids, blueprint_path, logger))
+    report_path = save_dispatch_report(results_dir, results, 'deployment-updates.json')
+    logger.info('The deployment updates report was saved to {}'.format(report_path))
+    _log_latencies(results, logger)
+
+    resource_creator.uninstall_all_deployments(threads_count)
+    resource_creator.delete_all_deployments(threads_count)
+    end_time = time()
+    logger.info('{0} took {1:.2f} seconds'.format(
+        'test_bulk_deployment_updates', end_time - start_time))
+
+
+def _install_scale_deployments(resource_creator, deployments_count):
+    resource_creator.blueprint_example.blueprint_path = SCALE_BLUEPRINT
+    resource_creator.blueprint_example.inputs = {}
+    threads_count = deployments_count
+    blueprint_id = resource_creator.upload_blueprint()
+    resource_creator.create_deployments(deployments_count,
+                                        threads_count,
+                                        blueprint_id)
+    resource_creator.install_deployments(deployments_count,
+                                         threads_count)
+    return resource_creator.deployments.ids()
+
+
+def _scale_deployments(benchmark, client, deployment_ids, delta, logger):
+    result = benchmark.run('scale',
+                           deployment_ids,
+                           None,
+                           parameters={'scalable_entity_name': SCALABLE_ENTITY,
+                                       'delta': delta})
+    result['delta'] = delta
+    assert_executions_succeeded(result)
+    result['node_instances'] = _node_instances_count(client, logger)
+    return result
+
+
+def _heal_deployments(benchmark, client, deployment_ids, logger):
+    # Healing one host instance of every deployment
+    host_instances = {}
+    for node_instance in util.list_all_resources(client.node_instances,
+                                                 node_id=SCALABLE_ENTITY,
+                                                 _include=['id', 'deployment_id']):
+        host_instances.setdefault(node_instance.deployment_id, node_instance.id)
+
+    def _start_heal(deployment_id):
+        return client.executions.start(
+            deployment_id,
+            'heal',
+            parameters={'node_instance_id': host_instances[deployment_id]}).id
+
+    result = benchmark.run_operation('heal', 'heal', deployment_ids, None, _start_heal)
+    assert_executions_succeeded(result)
+    result['node_instances'] = _node_instances_count(client, logger)
+    return result
+
+
+def _update_deployments(benchmark, client, deployment_ids, blueprint_path, logger):
+    def _start_update(deployment_id):
+        return client.deployment_updates.update(deployment_id, blueprint_path).execution_id
+
+    result = benchmark.run_operation('deployment update', 'update', deployment_ids, None,
+                                     _start_update)
+    assert_executions_succeeded(result)
+    result['node_instances'] = _node_instances_count(client, logger)
+    return result
+
+
+def _node_instances_count(client, logger):
+    node_instances = util.get_resource_list(client.node_instances, 'Node instances', logger,
+                                            _include=['id'], _size=1)
+    return node_instances.metadata.pagination.total
+
+
+def _log_latencies(results, logger):
+    logger.info('Operations latency by node instances count (p50 / p95):')
+    for result in results:
+        latency = result['latency']
+        logger.info('{0}{1} with {2} node instances: {3}'.format(
+            result['workflow_id'],
+            ' {0:+d}'.format(result['delta']) if 'delta' in result else '',
+            result['node_instances'],
+            '{0:.2f} / {1:.2f} seconds'.format(latency['p50'], latency['p95'])
+            if latency else 'N/A'))
+
+
+def _init_scale_deltas(request):
+    return sorted(int(delta) for delta in
+                  request.config.getoption('--scale-deltas').split(','))